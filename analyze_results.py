@@ -4,7 +4,6 @@
 from __future__ import annotations
 
 import argparse
-import json
 import sys
 from pathlib import Path
 from typing import List
@@ -14,11 +13,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from src.utils.data_loader import load_law_corpus
-from src.utils.reporting import make_snippet
-
-
-def _load_json(path: Path):
-    return json.loads(path.read_text(encoding="utf-8"))
+from src.utils.reporting import load_results_json, make_snippet
 
 
 def parse_args() -> argparse.Namespace:
@@ -32,15 +27,29 @@ def parse_args() -> argparse.Namespace:
 
 
 def _build_diff_cases(predictions: List[dict], corpus_path: Path, limit: int) -> List[dict]:
-    corpus = load_law_corpus(corpus_path)
-    cases: List[dict] = []
+    # Pick the failing entries first so the corpus is only loaded when there is
+    # something to show; the lazy corpus then keeps just record spans resident
+    # and materializes only the laws these cases mention.
+    failing = []
     for entry in predictions:
-        gt_ids = {int(doc_id) for doc_id in entry.get("law_ids", []) if doc_id is not None}
+        if len(failing) >= limit:
+            break
+        # run_benchmark writes integer ids, so ground truth decodes as ints; predicted
+        # ids are cast once here and reused for the mistakes list.
+        gt_ids = {doc_id for doc_id in entry.get("law_ids", []) if doc_id is not None}
         preds = entry.get("predictions", [])
         if not gt_ids or not preds:
             continue
-        if any(int(pred.get("law_id")) in gt_ids for pred in preds if pred.get("law_id") is not None):
+        scored_ids = [(int(pred["law_id"]), pred.get("score")) for pred in preds if pred.get("law_id") is not None]
+        if any(law_id in gt_ids for law_id, _ in scored_ids):
             continue
+        failing.append((entry, gt_ids, scored_ids))
+    if not failing:
+        return []
+
+    corpus = load_law_corpus(corpus_path, lazy=True)
+    cases: List[dict] = []
+    for entry, gt_ids, scored_ids in failing:
         ground_truth_docs = []
         for law_id in gt_ids:
             doc = corpus.get(law_id)
@@ -54,11 +63,8 @@ def _build_diff_cases(predictions: List[dict], corpus_path: Path, limit: int) ->
                 }
             )
         mistakes = []
-        for pred in preds:
-            law_id = pred.get("law_id")
-            if law_id is None:
-                continue
-            doc = corpus.get(int(law_id))
+        for law_id, score in scored_ids:
+            doc = corpus.get(law_id)
             if not doc:
                 continue
             mistakes.append(
@@ -66,7 +72,7 @@ def _build_diff_cases(predictions: List[dict], corpus_path: Path, limit: int) ->
                     "law_id": doc.doc_id,
                     "law_name": doc.law_name,
                     "snippet": make_snippet(doc.content),
-                    "score": pred.get("score"),
+                    "score": score,
                 }
             )
             if len(mistakes) >= 3:
@@ -80,8 +86,6 @@ def _build_diff_cases(predictions: List[dict], corpus_path: Path, limit: int) ->
                 "law_texts": entry.get("law_texts"),
             }
         )
-        if len(cases) >= limit:
-            break
     return cases
 
 
@@ -92,11 +96,11 @@ def main() -> None:
     diff_path = PROJECT_ROOT / args.diff
     corpus_path = PROJECT_ROOT / args.law_corpus
 
-    predictions = _load_json(predictions_path)
-    metrics = _load_json(metrics_path) if metrics_path.exists() else {}
+    predictions = load_results_json(predictions_path)
+    metrics = load_results_json(metrics_path) if metrics_path.exists() else {}
 
     if diff_path.exists():
-        diff_cases = _load_json(diff_path)[: args.limit]
+        diff_cases = load_results_json(diff_path)[: args.limit]
     else:
         diff_cases = _build_diff_cases(predictions, corpus_path, args.limit)
 
@@ -9,7 +9,7 @@ import logging
 import sys
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 import time
 
 PROJECT_ROOT = Path(__file__).resolve().parent
@@ -19,7 +19,9 @@ if str(PROJECT_ROOT) not in sys.path:
 from src.metrics.scoring import aggregate_metrics, evaluate_query
 from src.retrievers import build_retriever
 from src.utils import data_loader
-from src.utils.reporting import export_bad_cases, make_snippet, save_csv, save_json
+from src.utils.reporting import JsonArrayWriter, export_bad_cases, make_doc_snippet, save_csv, save_json
+
+_MAX_BAD_CASES = 200
 
 
 def _ensure_absolute(path_str: str) -> Path:
@@ -43,6 +45,21 @@ def _load_config(path: Path) -> Dict[str, Any]:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+def _iter_retrievals(retriever, queries: List[data_loader.QueryExample], top_k: int):
+    """Yield ``(example, retrieved)`` in query order.
+
+    Retrievers exposing ``search_many`` (e.g. ``remote``) get the whole query stream
+    so they can keep several requests in flight; others are searched one by one.
+    """
+
+    search_many = getattr(retriever, "search_many", None)
+    if search_many is None:
+        for example in queries:
+            yield example, retriever.search(example.query, top_k=top_k)
+        return
+    yield from zip(queries, search_many((example.query for example in queries), top_k=top_k))
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="LegalRAG benchmark runner")
     parser.add_argument("--config", default="configs/default.json", help="Path to config JSON")
@@ -84,45 +101,53 @@ def main() -> None:
     queries = data_loader.load_queries(queries_path, limit=max_queries)
     logging.info("Loaded %d queries", len(queries))
 
+    retriever_cfg = config.get("retriever", {})
+    retriever_type = retriever_cfg.get("type", "lexical")
+    # Offline retrievers index every document anyway; remote runs only look up the
+    # laws that come back, so they read the corpus lazily from a memory map.
+    lazy_corpus = data_cfg.get("lazy_corpus", retriever_type.lower() == "remote")
+
     logging.info("Loading law corpus from %s", law_corpus_path)
-    corpus = data_loader.load_law_corpus(law_corpus_path)
+    corpus = data_loader.load_law_corpus(law_corpus_path, lazy=lazy_corpus)
     logging.info("Loaded %d law documents", len(corpus))
 
-    retriever_cfg = config.get("retriever", {})
-    retriever_type = retriever_cfg.get("type", "lexical")
     top_k = args.top_k if args.top_k is not None else retriever_cfg.get("top_k", 10)
     logging.info("Initializing '%s' retriever with top_k=%d", retriever_type, top_k)
     retriever = build_retriever(retriever_type, corpus, params=retriever_cfg)
 
     per_query_metrics: List[dict] = []
     per_source_metrics: Dict[str, List[dict]] = defaultdict(list)
-    results: List[dict] = []
+    # Records are streamed to predictions.json as they are produced; only the first
+    # _MAX_BAD_CASES misses with predictions (all export_bad_cases can use) are kept.
+    bad_case_candidates: List[dict] = []
+    # Snippets of laws that recur across queries, condensed once for this run's corpus.
+    snippet_cache: Dict[Tuple[int, int], str] = {}
+    predictions_path = _resolve_path("predictions_path", "reports/predictions.json")
 
     bench_start = time.perf_counter()
 
-    for idx, example in enumerate(queries, 1):
-        retrieved = retriever.search(example.query, top_k=top_k)
-        predicted_ids = [doc.law_id for doc in retrieved]
-        metrics = evaluate_query(example.law_ids, predicted_ids, k=top_k)
-        per_query_metrics.append(metrics)
-        source_key = example.source or "unspecified"
-        per_source_metrics[source_key].append(metrics)
-        predictions_payload = [
-            {
-                "law_id": doc.law_id,
-                "law_name": doc.law_name,
-                "score": round(doc.score, 6),
-                "snippet": make_snippet(doc.content),
+    with JsonArrayWriter(predictions_path) as predictions_writer:
+        for idx, (example, retrieved) in enumerate(_iter_retrievals(retriever, queries, top_k), 1):
+            predicted_ids = [doc.law_id for doc in retrieved]
+            metrics = evaluate_query(example.law_ids, predicted_ids, k=top_k)
+            per_query_metrics.append(metrics)
+            source_key = example.source or "unspecified"
+            per_source_metrics[source_key].append(metrics)
+            predictions_payload = [
+                {
+                    "law_id": doc.law_id,
+                    "law_name": doc.law_name,
+                    "score": round(doc.score, 6),
+                    "snippet": make_doc_snippet(snippet_cache, doc.law_id, doc.content),
+                }
+                for doc in retrieved
+            ]
+            bench_info = {
+                "source": example.source,
+                "detailed_source": example.detailed_source,
             }
-            for doc in retrieved
-        ]
-        bench_info = {
-            "source": example.source,
-            "detailed_source": example.detailed_source,
-        }
-        ground_truth_laws = example.law_contents if example.law_contents is not None else []
-        results.append(
-            {
+            ground_truth_laws = example.law_contents if example.law_contents is not None else []
+            record = {
                 "query": example.query,
                 "law_ids": example.law_ids,
                 "law_texts": ground_truth_laws,
@@ -130,9 +155,11 @@ def main() -> None:
                 "predictions": predictions_payload,
                 "metrics": metrics,
             }
-        )
-        if idx % 25 == 0:
-            logging.info("Processed %d/%d queries", idx, len(queries))
+            predictions_writer.write(record)
+            if not metrics.get("recall") and predictions_payload and len(bad_case_candidates) < _MAX_BAD_CASES:
+                bad_case_candidates.append(record)
+            if idx % 25 == 0:
+                logging.info("Processed %d/%d queries", idx, len(queries))
 
     aggregated = aggregate_metrics(per_query_metrics)
     per_source_scores = {
@@ -158,14 +185,12 @@ def main() -> None:
     aggregated["metadata"] = metadata
     aggregated["per_source"] = per_source_scores
 
-    predictions_path = _resolve_path("predictions_path", "reports/predictions.json")
     metrics_json_path = _resolve_path("metrics_json", "reports/metrics.json")
     metrics_csv_path = _resolve_path("metrics_csv", "reports/metrics.csv")
     per_source_csv_path = _resolve_path("per_source_csv", "reports/per_source_metrics.csv")
     bad_cases_path = _resolve_path("bad_cases_path", "bad_cases/diff_cases.json")
 
-    save_json(results, predictions_path)
-    save_json(aggregated, metrics_json_path)
+    save_json(aggregated, metrics_json_path, pretty=True)
     save_csv(
         [
             {"metric": "ndcg", "value": aggregated.get("ndcg")},
@@ -196,7 +221,7 @@ def main() -> None:
             per_source_csv_path,
             fieldnames=["source", "ndcg", "recall", "mrr", "hit_rate", "total_queries"],
         )
-    export_bad_cases(results, corpus, bad_cases_path, top_errors=3, max_cases=200)
+    export_bad_cases(bad_case_candidates, corpus, bad_cases_path, top_errors=3, max_cases=_MAX_BAD_CASES)
     logging.info("Artifacts saved under %s", run_dir)
 
 
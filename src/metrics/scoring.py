@@ -3,94 +3,126 @@
 from __future__ import annotations
 
 import math
-from typing import Iterable, List, Sequence
+from itertools import accumulate
+from operator import itemgetter
+from typing import Iterable, Sequence, Tuple
 
+import numpy as np
 
-def _dcg(relevances: Sequence[int]) -> float:
-    score = 0.0
-    for idx, rel in enumerate(relevances):
-        if rel <= 0:
-            continue
-        score += rel / math.log2(idx + 2)
+_METRIC_KEYS = ("ndcg", "recall", "mrr")
+_METRIC_GETTER = itemgetter(*_METRIC_KEYS)
+
+_DISCOUNT_TABLE_SIZE = 4096
+# Rank discounts 1 / log2(idx + 2) for 0-based positions, shared by every query.
+_LOG2_INV = tuple(1.0 / math.log2(idx + 2) for idx in range(_DISCOUNT_TABLE_SIZE))
+# _IDEAL_DCG[n] is the DCG of n relevant documents ranked at the top.
+_IDEAL_DCG = (0.0, *accumulate(_LOG2_INV))
+
+
+def _discount(idx: int) -> float:
+    if idx < _DISCOUNT_TABLE_SIZE:
+        return _LOG2_INV[idx]
+    return 1.0 / math.log2(idx + 2)
+
+
+def _ideal_dcg(num_relevant: int) -> float:
+    if num_relevant <= _DISCOUNT_TABLE_SIZE:
+        return _IDEAL_DCG[num_relevant]
+    score = _IDEAL_DCG[-1]
+    for idx in range(_DISCOUNT_TABLE_SIZE, num_relevant):
+        score += _discount(idx)
     return score
 
 
-def compute_ndcg(ground_truth: Sequence[int], predictions: Sequence[int], k: int | None = None) -> float | None:
-    """Compute binary NDCG for a single query."""
+def _score_predictions(
+    ground_truth: Sequence[int],
+    predictions: Sequence[int],
+    k: int | None = None,
+) -> Tuple[float, float, float] | None:
+    """Compute (NDCG, Recall, MRR) in one scan over the top-k predictions.
+
+    Ids must already be ``int``: ``load_queries`` normalizes ground truth and the
+    retrievers emit integer law ids, so no per-element casting happens here.
+    Returns ``None`` when the query has no ground-truth labels.
+    """
 
-    gt_set = {int(doc_id) for doc_id in ground_truth if doc_id is not None}
+    gt_set = set(ground_truth)
     if not gt_set:
         return None
+    if __debug__:
+        assert all(type(doc_id) is int for doc_id in gt_set), "ground-truth ids must be ints"
     if k is None:
         k = len(predictions)
-    truncated = list(predictions)[:k]
-    relevances = [1 if int(doc_id) in gt_set else 0 for doc_id in truncated]
-    ideal = sorted(relevances, reverse=True)
-    # If all predictions are zero relevance, ideal DCG should still reflect optimal scenario.
-    if sum(relevances) < len(gt_set):
-        ideal = [1] * min(len(gt_set), k)
-    actual_dcg = _dcg(relevances)
-    ideal_dcg = _dcg(ideal)
-    if ideal_dcg == 0:
-        return 0.0
-    return actual_dcg / ideal_dcg
+    hits = 0
+    dcg = 0.0
+    first_hit: int | None = None
+    found = set()
+    for idx, doc_id in enumerate(predictions[:k]):
+        if doc_id not in gt_set:
+            continue
+        hits += 1
+        dcg += _discount(idx)
+        found.add(doc_id)
+        if first_hit is None:
+            first_hit = idx
+    # Repeated hits on the same law still count towards DCG, so the ideal ranking
+    # only falls back to min(|GT|, k) ones while fewer hits than labels were seen.
+    ideal_dcg = _ideal_dcg(hits if hits >= len(gt_set) else min(len(gt_set), k))
+    ndcg = dcg / ideal_dcg if ideal_dcg else 0.0
+    recall = len(found) / len(gt_set)
+    mrr = 1.0 / (first_hit + 1) if first_hit is not None else 0.0
+    return ndcg, recall, mrr
+
+
+def compute_ndcg(ground_truth: Sequence[int], predictions: Sequence[int], k: int | None = None) -> float | None:
+    """Compute binary NDCG for a single query."""
+
+    scores = _score_predictions(ground_truth, predictions, k=k)
+    return scores[0] if scores is not None else None
 
 
 def compute_recall(ground_truth: Sequence[int], predictions: Sequence[int], k: int | None = None) -> float | None:
-    gt_set = {int(doc_id) for doc_id in ground_truth if doc_id is not None}
-    if not gt_set:
-        return None
-    truncated = set(int(doc_id) for doc_id in (predictions[:k] if k is not None else predictions))
-    return len(gt_set & truncated) / len(gt_set)
+    scores = _score_predictions(ground_truth, predictions, k=k)
+    return scores[1] if scores is not None else None
 
 
 def compute_mrr(ground_truth: Sequence[int], predictions: Sequence[int], k: int | None = None) -> float | None:
-    gt_set = {int(doc_id) for doc_id in ground_truth if doc_id is not None}
-    if not gt_set:
-        return None
-    search_space = predictions if k is None else predictions[:k]
-    for idx, doc_id in enumerate(search_space):
-        if int(doc_id) in gt_set:
-            return 1.0 / (idx + 1)
-    return 0.0
+    scores = _score_predictions(ground_truth, predictions, k=k)
+    return scores[2] if scores is not None else None
 
 
 def evaluate_query(ground_truth: Sequence[int], predictions: Sequence[int], k: int | None = None) -> dict:
     """Return a dictionary of per-query metrics."""
 
-    metrics = {
-        "ndcg": compute_ndcg(ground_truth, predictions, k=k),
-        "recall": compute_recall(ground_truth, predictions, k=k),
-        "mrr": compute_mrr(ground_truth, predictions, k=k),
-    }
-    return metrics
+    scores = _score_predictions(ground_truth, predictions, k=k)
+    if scores is None:
+        return {"ndcg": None, "recall": None, "mrr": None}
+    ndcg, recall, mrr = scores
+    return {"ndcg": ndcg, "recall": recall, "mrr": mrr}
 
 
 def aggregate_metrics(per_query: Iterable[dict]) -> dict:
-    """Average metrics while skipping queries without ground-truth labels."""
-
-    totals = {"ndcg": 0.0, "recall": 0.0, "mrr": 0.0}
-    counts = {"ndcg": 0, "recall": 0, "mrr": 0}
-    num_queries = 0
-    hit_count = 0
-
-    for entry in per_query:
-        num_queries += 1
-        recall_value = entry.get("recall")
-        if recall_value and recall_value > 0:
-            hit_count += 1
-        for key in ("ndcg", "recall", "mrr"):
-            value = entry.get(key)
-            if value is None:
-                continue
-            totals[key] += value
-            counts[key] += 1
+    """Average metrics while skipping queries without ground-truth labels.
+
+    Entries are ``evaluate_query`` dicts, so every metric key is present.
+    """
+
+    # One row per query; float dtype turns unlabeled (None) metrics into NaN.
+    values = np.array(
+        list(map(_METRIC_GETTER, per_query)),
+        dtype=np.float64,
+    ).reshape(-1, len(_METRIC_KEYS))
+    num_queries = values.shape[0]
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+    sums = np.nansum(values, axis=0)
 
     averaged = {
-        key: (totals[key] / counts[key] if counts[key] else None)
-        for key in totals
+        key: (float(sums[idx] / counts[idx]) if counts[idx] else None)
+        for idx, key in enumerate(_METRIC_KEYS)
     }
-    averaged["evaluated_queries"] = max(counts.values(), default=0)
+    averaged["evaluated_queries"] = int(counts.max(initial=0))
     averaged["total_queries"] = num_queries
-    averaged["hit_rate"] = hit_count / num_queries if num_queries else None
+    # NaN compares False, so unlabeled queries never count as hits.
+    hits = int(np.count_nonzero(values[:, _METRIC_KEYS.index("recall")] > 0))
+    averaged["hit_rate"] = hits / num_queries if num_queries else None
     return averaged
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import Any, Dict
 
-from src.retrievers.lexical import LexicalRetriever
+from src.retrievers.lexical import BM25Retriever, LexicalRetriever
 from src.retrievers.remote import RemoteRetriever
 from src.utils.data_loader import LawCorpus
 
@@ -14,10 +14,25 @@ def build_retriever(name: str, corpus: LawCorpus, params: Dict[str, Any] | None
     params = params or {}
 
     if normalized == "lexical":
-        return LexicalRetriever(corpus)
+        num_workers = params.get("num_workers")
+        return LexicalRetriever(corpus, num_workers=num_workers)
+    if normalized == "bm25":
+        k1 = params.get("k1", 1.5)
+        b = params.get("b", 0.75)
+        num_workers = params.get("num_workers")
+        return BM25Retriever(corpus, k1=k1, b=b, num_workers=num_workers)
     if normalized == "remote":
         endpoint = params.get("endpoint")
         timeout = params.get("timeout", 10.0)
         proxies = params.get("proxies")
-        return RemoteRetriever(corpus, endpoint=endpoint, timeout=timeout, proxies=proxies)
+        max_concurrency = params.get("max_concurrency", 8)
+        batch_size = params.get("batch_size", 8)
+        return RemoteRetriever(
+            corpus,
+            endpoint=endpoint,
+            timeout=timeout,
+            proxies=proxies,
+            max_concurrency=max_concurrency,
+            batch_size=batch_size,
+        )
     raise ValueError(f"Unknown retriever type: {name}")
@@ -1,25 +1,68 @@
-"""Simple lexical retriever baseline using TF-IDF style scoring."""
+"""Offline lexical retrievers (TF-IDF and BM25) over a sparse term index."""
 
 from __future__ import annotations
 
 import math
+import os
 import re
-from collections import Counter
+from abc import ABC, abstractmethod
+from array import array
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import List
+from functools import lru_cache
+from itertools import count
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix
 
 from src.utils.data_loader import LawCorpus, LawDocument
 
 _TOKEN_PATTERN = re.compile(r"[\w]+", re.UNICODE)
+_NON_CJK_PATTERN = re.compile(r"[^\u4e00-\u9fff]+")
+_TOKENIZE_CHUNK_SIZE = 1000
+_QUERY_CACHE_SIZE = 4096
+
+# A query as parallel arrays of vocabulary ids and their weights.
+QueryTerms = Tuple[np.ndarray, np.ndarray]
 
 
 def _tokenize(text: str) -> List[str]:
-    tokens = [token.lower() for token in _TOKEN_PATTERN.findall(text)]
-    cjk_chars = [ch for ch in text if "\u4e00" <= ch <= "\u9fff"]
-    return tokens + cjk_chars
+    """Word tokens (lowercased) followed by every CJK character as a unigram."""
+
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    # Strip everything but CJK; each remaining character becomes a token.
+    tokens.extend(_NON_CJK_PATTERN.sub("", text))
+    return tokens
+
+
+def _top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Return indices of the best positive scores, highest first (ties by index)."""
 
+    if top_k <= 0:
+        return np.empty(0, dtype=np.intp)
+    positive = scores > 0
+    hits = np.count_nonzero(positive)
+    if hits > top_k:
+        # Find the k-th best score (partitioning only the hits when they are a
+        # minority), then keep everything tied with it so ties resolve by corpus order.
+        pool = scores if hits * 2 > scores.size else scores[positive]
+        kth = np.partition(pool, -top_k)[-top_k]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        # No more hits than slots: nothing to select, only to order.
+        candidates = np.flatnonzero(positive)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:top_k]]
 
-@dataclass
+
+def _frozen(values: np.ndarray) -> np.ndarray:
+    values.flags.writeable = False
+    return values
+
+
+@dataclass(slots=True)
 class RetrievedDocument:
     law_id: int
     law_name: str
@@ -27,79 +70,254 @@ class RetrievedDocument:
     content: str
 
 
-class LexicalRetriever:
-    """Naive TF-IDF retriever that runs fully offline for benchmarking."""
+def _count_chunk(texts: Sequence[str]) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """Term counts for a slice of the corpus as CSR parts with chunk-local term ids.
+
+    Returns the local vocabulary (in first-occurrence order) with ``indptr``,
+    ``indices`` and ``counts`` arrays; kept at module level so worker processes
+    can pickle it.
+    """
+
+    # Unseen terms get the next id on lookup, so ids are assigned in the same pass
+    # that writes the postings and no per-document Counter outlives its document.
+    local_ids: Dict[str, int] = defaultdict(count().__next__)
+    # Counts are small integers, which float32 holds exactly.
+    indptr = array("q", [0])
+    indices = array("q")
+    data = array("f")
+    for text in texts:
+        counts = Counter(_tokenize(text))
+        indices.extend(map(local_ids.__getitem__, counts))
+        data.extend(counts.values())
+        indptr.append(len(indices))
+    return (
+        list(local_ids),
+        np.frombuffer(indptr, dtype=np.int64),
+        np.frombuffer(indices, dtype=np.int64),
+        np.frombuffer(data, dtype=np.float32),
+    )
+
+
+def _merge_chunks(
+    chunk_parts: Iterable[Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]],
+    doc_count: int,
+) -> Tuple[Dict[str, int], csr_matrix]:
+    """Remap chunk-local term ids onto one vocabulary and stack the chunks into a CSR matrix."""
+
+    term_to_id: Dict[str, int] = {}
+    indptr_parts = [np.zeros(1, dtype=np.int64)]
+    indices_parts: List[np.ndarray] = []
+    data_parts: List[np.ndarray] = []
+    offset = 0
+    for terms, indptr, indices, counts in chunk_parts:
+        remap = np.fromiter(
+            (term_to_id.setdefault(term, len(term_to_id)) for term in terms),
+            dtype=np.int64,
+            count=len(terms),
+        )
+        indices_parts.append(remap[indices])
+        data_parts.append(counts)
+        indptr_parts.append(indptr[1:] + offset)
+        offset += int(indptr[-1])
+
+    matrix = csr_matrix(
+        (
+            np.concatenate(data_parts) if data_parts else np.zeros(0, dtype=np.float32),
+            np.concatenate(indices_parts) if indices_parts else np.zeros(0, dtype=np.int64),
+            np.concatenate(indptr_parts),
+        ),
+        shape=(doc_count, len(term_to_id)),
+    )
+    return term_to_id, matrix
+
+
+def _count_terms(
+    documents: Sequence[LawDocument],
+    num_workers: Optional[int] = None,
+) -> Tuple[Dict[str, int], csr_matrix]:
+    """Tokenize ``documents`` into a (documents x vocabulary) raw term-frequency matrix.
+
+    Tokenization is spread over ``num_workers`` processes (default: one per CPU)
+    in chunks of ``_TOKENIZE_CHUNK_SIZE`` documents. Chunks come back in order and
+    are merged as they arrive, with their local ids remapped onto one vocabulary,
+    so term ids are the same whatever the worker count.
+    """
 
-    def __init__(self, corpus: LawCorpus):
+    texts = [doc.content for doc in documents]
+    chunks = [texts[start : start + _TOKENIZE_CHUNK_SIZE] for start in range(0, len(texts), _TOKENIZE_CHUNK_SIZE)]
+    workers = min(num_workers or os.cpu_count() or 1, len(chunks))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return _merge_chunks(executor.map(_count_chunk, chunks), len(documents))
+    return _merge_chunks(map(_count_chunk, chunks), len(documents))
+
+
+class _SparseRetriever(ABC):
+    """Shared plumbing for retrievers scoring a sparse document-term index."""
+
+    def __init__(self, corpus: LawCorpus, num_workers: Optional[int] = None):
         self.corpus = corpus
-        self._index = []
+        self.num_workers = num_workers
+        self._docs: List[LawDocument] = []
+        self._term_to_id: Dict[str, int] = {}
         self._build_index()
+        # Keyed on the verbatim query text and tied to the index built above, so
+        # repeated queries (duplicates, parameter sweeps) skip tokenization.
+        self._query_terms = lru_cache(maxsize=_QUERY_CACHE_SIZE)(self._vectorize_query)
 
+    @abstractmethod
     def _build_index(self) -> None:
-        documents = self.corpus.documents
-        doc_count = len(documents)
-        if doc_count == 0:
-            return
-        df_counter: Counter[str] = Counter()
-        counted_docs = []
-        for doc in documents:
-            tokens = _tokenize(doc.content)
-            counts = Counter(tokens)
-            counted_docs.append((doc, counts))
-            df_counter.update(counts.keys())
-        idf = {term: math.log((doc_count + 1) / (freq + 1)) + 1.0 for term, freq in df_counter.items()}
-        for doc, counts in counted_docs:
-            vector = {}
-            norm = 0.0
-            for term, freq in counts.items():
-                tf = 1.0 + math.log(freq)
-                weight = tf * idf.get(term, 1.0)
-                vector[term] = weight
-                norm += weight * weight
-            norm = math.sqrt(norm) if norm > 0 else 1.0
-            self._index.append(
-                {
-                    "doc": doc,
-                    "vector": vector,
-                    "norm": norm,
-                }
-            )
+        """Index ``self.corpus``, filling ``_docs`` and ``_term_to_id``."""
 
-    def _vectorize_query(self, query: str) -> tuple[dict, float]:
-        tokens = _tokenize(query)
-        counts = Counter(tokens)
-        vector = {}
-        norm = 0.0
-        for term, freq in counts.items():
-            tf = 1.0 + math.log(freq)
-            vector[term] = tf
-            norm += tf * tf
-        return vector, math.sqrt(norm) if norm > 0 else 1.0
+    @abstractmethod
+    def _vectorize_query(self, query: str) -> Optional[QueryTerms]:
+        """Map a query to (term ids, weights) over the vocabulary, or None if nothing matches."""
+
+    @abstractmethod
+    def _score_terms(self, term_ids: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Score every indexed document for the given query terms."""
+
+    def _score(self, query: str) -> Optional[np.ndarray]:
+        query_terms = self._query_terms(query)
+        if query_terms is None:
+            return None
+        return self._score_terms(*query_terms)
 
     def search(self, query: str, top_k: int = 10) -> List[RetrievedDocument]:
-        if not query.strip():
+        if not query.strip() or not self._docs:
             return []
-        query_vec, query_norm = self._vectorize_query(query)
-        scores: List[RetrievedDocument] = []
-        for node in self._index:
-            doc_vec = node["vector"]
-            score = 0.0
-            for term, weight in query_vec.items():
-                doc_weight = doc_vec.get(term)
-                if doc_weight is None:
-                    continue
-                score += weight * doc_weight
-            if score == 0.0:
-                continue
-            score /= (query_norm * node["norm"])
-            doc: LawDocument = node["doc"]
-            scores.append(
+        scores = self._score(query)
+        if scores is None:
+            return []
+        results: List[RetrievedDocument] = []
+        for idx in _top_k_indices(scores, top_k):
+            doc = self._docs[idx]
+            results.append(
                 RetrievedDocument(
                     law_id=doc.doc_id,
                     law_name=doc.law_name,
-                    score=score,
+                    score=float(scores[idx]),
                     content=doc.content,
                 )
             )
-        scores.sort(key=lambda item: item.score, reverse=True)
-        return scores[:top_k]
+        return results
+
+
+class LexicalRetriever(_SparseRetriever):
+    """Naive TF-IDF retriever that runs fully offline for benchmarking.
+
+    Documents are stored as rows of an L2-normalized float32 CSR matrix so a
+    query is scored against the whole corpus with a single sparse
+    matrix-vector product; float32 halves the memory traffic of that product
+    and is plenty of precision for ranking.
+    """
+
+    def __init__(self, corpus: LawCorpus, num_workers: Optional[int] = None):
+        self._matrix: Optional[csr_matrix] = None
+        super().__init__(corpus, num_workers=num_workers)
+
+    def _build_index(self) -> None:
+        documents = self.corpus.documents
+        doc_count = len(documents)
+        if doc_count == 0:
+            return
+        term_to_id, matrix = _count_terms(documents, num_workers=self.num_workers)
+        vocab_size = len(term_to_id)
+        indices = matrix.indices
+        data = np.log(matrix.data) + np.float32(1.0)
+
+        # Each term occurs at most once per row, so column counts are document frequencies.
+        df = np.bincount(indices, minlength=vocab_size)
+        idf = (np.log((doc_count + 1) / (df + 1)) + 1.0).astype(np.float32)
+        data *= idf[indices]
+
+        row_ids = np.repeat(np.arange(doc_count), np.diff(matrix.indptr))
+        norms = np.sqrt(np.bincount(row_ids, weights=data * data, minlength=doc_count))
+        norms[norms == 0] = 1.0
+        data /= norms.astype(np.float32)[row_ids]
+        matrix.data = data
+
+        self._docs = list(documents)
+        self._term_to_id = term_to_id
+        self._matrix = matrix
+
+    def _vectorize_query(self, query: str) -> Optional[QueryTerms]:
+        term_ids: List[int] = []
+        weights: List[float] = []
+        norm = 0.0
+        for term, freq in Counter(_tokenize(query)).items():
+            tf = 1.0 + math.log(freq)
+            # Out-of-vocabulary terms still count towards the query norm, as in cosine TF-IDF.
+            norm += tf * tf
+            term_id = self._term_to_id.get(term)
+            if term_id is None:
+                continue
+            term_ids.append(term_id)
+            weights.append(tf)
+        if not term_ids:
+            return None
+        query_weights = np.asarray(weights, dtype=np.float32) / np.float32(math.sqrt(norm))
+        return _frozen(np.asarray(term_ids, dtype=np.int64)), _frozen(query_weights)
+
+    def _score_terms(self, term_ids: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        query_vec = np.zeros(len(self._term_to_id), dtype=np.float32)
+        query_vec[term_ids] = weights
+        return self._matrix.dot(query_vec)
+
+
+class BM25Retriever(_SparseRetriever):
+    """Okapi BM25 over the same sparse index, walking only the query terms' postings.
+
+    The saturated term weights are precomputed per posting at index time, so a
+    query only gathers its own columns and takes one sparse dot product.
+    """
+
+    def __init__(
+        self,
+        corpus: LawCorpus,
+        k1: float = 1.5,
+        b: float = 0.75,
+        num_workers: Optional[int] = None,
+    ):
+        self.k1 = k1
+        self.b = b
+        self._weights: Optional[csc_matrix] = None
+        super().__init__(corpus, num_workers=num_workers)
+
+    def _build_index(self) -> None:
+        documents = self.corpus.documents
+        doc_count = len(documents)
+        if doc_count == 0:
+            return
+        term_to_id, matrix = _count_terms(documents, num_workers=self.num_workers)
+        # Lengths are summed in float64 (exact) and stored as float32 like the weights.
+        doc_len = np.asarray(matrix.sum(axis=1, dtype=np.float64)).ravel()
+        avgdl = doc_len.mean() or 1.0
+        df = np.bincount(matrix.indices, minlength=len(term_to_id))
+        idf = np.log((doc_count - df + 0.5) / (df + 0.5) + 1.0).astype(np.float32)
+        # Per-document part of the BM25 denominator: k1 * (1 - b + b * |d| / avgdl).
+        length_norm = (self.k1 * (1.0 - self.b + self.b * doc_len / avgdl)).astype(np.float32)
+
+        row_ids = np.repeat(np.arange(doc_count), np.diff(matrix.indptr))
+        tfs = matrix.data
+        matrix.data = idf[matrix.indices] * tfs * np.float32(self.k1 + 1.0) / (tfs + length_norm[row_ids])
+
+        self._docs = list(documents)
+        self._term_to_id = term_to_id
+        self._weights = matrix.tocsc()
+
+    def _vectorize_query(self, query: str) -> Optional[QueryTerms]:
+        term_ids: List[int] = []
+        query_freqs: List[float] = []
+        for term, freq in Counter(_tokenize(query)).items():
+            term_id = self._term_to_id.get(term)
+            if term_id is None:
+                continue
+            term_ids.append(term_id)
+            query_freqs.append(float(freq))
+        if not term_ids:
+            return None
+        return _frozen(np.asarray(term_ids, dtype=np.int64)), _frozen(np.asarray(query_freqs, dtype=np.float32))
+
+    def _score_terms(self, term_ids: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        return self._weights[:, term_ids].dot(weights)
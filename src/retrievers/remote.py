@@ -3,17 +3,22 @@
 from __future__ import annotations
 
 import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Optional
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List, Optional, Sequence
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from src.utils.data_loader import LawCorpus, LawDocument
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class RetrievedDocument:
     """Normalized retrieval output consumed by the benchmark."""
 
@@ -32,6 +37,8 @@ class RemoteRetriever:
         endpoint: str,
         timeout: float = 10.0,
         proxies: Optional[dict] = None,
+        max_concurrency: int = 8,
+        batch_size: int = 8,
     ) -> None:
         if not endpoint:
             raise ValueError("RemoteRetriever requires a non-empty endpoint URL")
@@ -39,11 +46,32 @@ class RemoteRetriever:
         self.endpoint = endpoint
         self.timeout = timeout
         self.proxies = proxies if proxies is not None else {"http": None, "https": None}
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.batch_size = max(1, int(batch_size))
+        # One pooled session for the whole run so TCP/TLS connections are reused
+        # across queries; the pool is sized for the concurrent search_many workers.
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_concurrency,
+            max_retries=Retry(total=2, backoff_factor=0.1),
+        )
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
 
-    def _call_service(self, query: str, top_k: int) -> List[dict]:
-        payload = {"queries": [query], "topk": top_k, "return_scores": True}
+    def _call_service(self, queries: Sequence[str], top_k: int) -> List[Optional[List[dict]]]:
+        """POST ``queries`` in one payload; returns one raw result list per query.
+
+        A query gets None instead of a list when the request failed or the
+        response has no entry for it, so callers can tell that from "no hits".
+        """
+
+        payload = {"queries": list(queries), "topk": top_k, "return_scores": True}
+        missing: List[Optional[List[dict]]] = [None] * len(queries)
         try:
-            response = requests.post(
+            # Proxies stay per-request: None entries here are what keep HTTP(S)_PROXY
+            # from the environment away from the retrieval service.
+            response = self._session.post(
                 self.endpoint,
                 json=payload,
                 timeout=self.timeout,
@@ -52,19 +80,19 @@ class RemoteRetriever:
             response.raise_for_status()
             data = response.json()
         except requests.exceptions.Timeout:
-            logger.warning("Retriever timeout for query: %s", query[:50])
-            return []
+            logger.warning("Retriever timeout for %d queries, first: %s", len(queries), queries[0][:50])
+            return missing
         except requests.exceptions.RequestException as exc:
             logger.error("Retriever request failed: %s", exc)
-            return []
+            return missing
         except ValueError as exc:
             logger.error("Failed to decode retriever JSON: %s", exc)
-            return []
+            return missing
 
-        results = data.get("result", [])
-        if not results:
-            return []
-        return results[0] or []
+        results = data.get("result", []) or []
+        if len(results) < len(queries):
+            logger.warning("Retriever returned %d result lists for %d queries", len(results), len(queries))
+        return [(results[idx] or []) if idx < len(results) else None for idx in range(len(queries))]
 
     def _materialize_doc(self, law_id: int) -> tuple[str, str]:
         doc: Optional[LawDocument] = self.corpus.get(law_id)
@@ -72,10 +100,7 @@ class RemoteRetriever:
             return (f"法条 {law_id}", "")
         return (doc.law_name, doc.content)
 
-    def search(self, query: str, top_k: int = 10) -> List[RetrievedDocument]:
-        if not query.strip():
-            return []
-        raw_results = self._call_service(query, top_k)
+    def _parse_results(self, raw_results: List[dict], top_k: int) -> List[RetrievedDocument]:
         retrieved: List[RetrievedDocument] = []
         for entry in raw_results:
             document = entry.get("document", {}) if isinstance(entry, dict) else {}
@@ -99,3 +124,49 @@ class RemoteRetriever:
             if len(retrieved) >= top_k:
                 break
         return retrieved
+
+    def search(self, query: str, top_k: int = 10) -> List[RetrievedDocument]:
+        return self.search_batch([query], top_k=top_k)[0]
+
+    def search_batch(self, queries: Sequence[str], top_k: int = 10) -> List[List[RetrievedDocument]]:
+        """Retrieve for all ``queries`` with a single HTTP request, preserving order."""
+
+        retrieved: List[List[RetrievedDocument]] = [[] for _ in queries]
+        positions = [idx for idx, query in enumerate(queries) if query.strip()]
+        if not positions:
+            return retrieved
+        raw_batches = self._call_service([queries[idx] for idx in positions], top_k)
+        for idx, raw_results in zip(positions, raw_batches):
+            if raw_results is None and len(positions) > 1:
+                # The batch failed or came back short: retry this query on its own so
+                # one bad request does not turn its healthy neighbours into misses.
+                raw_results = self._call_service([queries[idx]], top_k)[0]
+            if raw_results is None:
+                logger.warning("No retriever response for query, scoring it as a miss: %s", queries[idx][:50])
+                raw_results = []
+            retrieved[idx] = self._parse_results(raw_results, top_k)
+        return retrieved
+
+    def search_many(self, queries: Iterable[str], top_k: int = 10) -> Iterator[List[RetrievedDocument]]:
+        """Search ``queries`` as ``batch_size`` payloads with up to ``max_concurrency`` in flight.
+
+        ``queries`` is consumed lazily and results are yielded in the same order,
+        from one worker pool that stays busy for the whole iterable.
+        """
+
+        query_iter = iter(queries)
+        batches = iter(lambda: list(islice(query_iter, self.batch_size)), [])
+        if self.max_concurrency == 1:
+            for batch in batches:
+                yield from self.search_batch(batch, top_k=top_k)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            # Queue a few batches beyond the worker count so a slow head-of-line
+            # batch does not leave the other workers idle.
+            pending: Deque[Future] = deque()
+            for batch in batches:
+                pending.append(executor.submit(self.search_batch, batch, top_k))
+                if len(pending) >= 2 * self.max_concurrency:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
@@ -2,39 +2,147 @@
 
 from __future__ import annotations
 
+import asyncio
 import csv
 import json
+from itertools import repeat
+from operator import itemgetter
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import Any, Dict, Iterable, Sequence, Tuple
 
 from src.utils.data_loader import LawCorpus, LawDocument
 
+try:  # orjson serializes straight to UTF-8 bytes; fall back to the stdlib encoder.
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_WRITE_BUFFER_SIZE = 1 << 20
+
 
 def _ensure_parent(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
-def save_json(payload, path: Path) -> None:
+def _dumps(payload: Any, pretty: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON: compact by default, 2-space indented when ``pretty``."""
+
+    if orjson is not None:
+        # OPT_NON_STR_KEYS stringifies int keys the way the stdlib encoder does.
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(payload, option=option)
+    if pretty:
+        return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class JsonArrayWriter:
+    """Write a JSON array element by element so records need not stay in memory.
+
+    Use as a context manager. Records go to a temporary file next to ``path``,
+    which replaces ``path`` only when the block exits cleanly; if it raises, the
+    partial file is removed, so a crashed run never leaves a truncated array
+    that still parses. Records are compact, one per line, unless ``pretty`` is set.
+    """
+
+    def __init__(self, path: Path, pretty: bool = False) -> None:
+        self.path = path
+        self.pretty = pretty
+        self.count = 0
+        self._tmp_path = path.with_name(f"{path.name}.tmp")
+        self._handle = None
+
+    def __enter__(self) -> "JsonArrayWriter":
+        _ensure_parent(self.path)
+        # Records arrive as many small writes; a large buffer turns them into few syscalls.
+        self._handle = self._tmp_path.open("wb", buffering=_WRITE_BUFFER_SIZE)
+        self._handle.write(b"[")
+        return self
+
+    def write(self, record: Any) -> None:
+        self._handle.write(b",\n" if self.count else b"\n")
+        self._handle.write(_dumps(record, pretty=self.pretty))
+        self.count += 1
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self._handle.close()
+            self._tmp_path.unlink(missing_ok=True)
+            return
+        self._handle.write(b"\n]\n" if self.count else b"]\n")
+        self._handle.close()
+        self._tmp_path.replace(self.path)
+
+
+def load_results_json(path: Path) -> Any:
+    """Read a JSON report (predictions, metrics, diff cases) back, via orjson when available."""
+
+    raw = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def save_json(payload, path: Path, pretty: bool = False) -> None:
+    """Write ``payload`` as compact JSON; pass ``pretty=True`` for files meant for people."""
+
     _ensure_parent(path)
-    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    path.write_bytes(_dumps(payload, pretty=pretty))
+
+
+async def save_json_async(payload, path: Path, pretty: bool = False) -> None:
+    """``save_json`` in a worker thread, for async callers overlapping it with other work."""
+
+    await asyncio.to_thread(save_json, payload, path, pretty)
 
 
 def save_csv(rows: Sequence[dict], path: Path, fieldnames: Sequence[str]) -> None:
     _ensure_parent(path)
-    with path.open("w", encoding="utf-8", newline="") as handle:
-        writer = csv.DictWriter(handle, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
+    getter = itemgetter(*fieldnames)
+    if len(fieldnames) == 1:  # a single-key itemgetter returns the bare value
+        values = ((getter(row),) for row in rows)
+    else:
+        values = (getter(row) for row in rows)
+    with path.open("w", encoding="utf-8", newline="", buffering=_WRITE_BUFFER_SIZE) as handle:
+        writer = csv.writer(handle)
+        writer.writerow(fieldnames)
+        writer.writerows(values)
 
 
 def make_snippet(text: str, limit: int = 200) -> str:
     """Condense text to a single line snippet."""
 
-    compact = " ".join(text.split())
-    if len(compact) <= limit:
-        return compact
-    return f"{compact[: limit - 3]}..."
+    # Already one compact line? Only " " is both printable and whitespace, so this
+    # is exactly the case where split/join would hand back the same string.
+    if len(text) <= limit and text.isprintable() and "  " not in text and text[:1] != " " and text[-1:] != " ":
+        return text
+
+    # Collapse whitespace on a head slice only. The collapsed head is a prefix of
+    # the collapsed text, so once it outgrows ``limit`` the rest cannot matter;
+    # otherwise widen the slice until it does or covers the whole text.
+    # (Below 3 the ellipsis slice is negative, i.e. relative to the full text.)
+    window = limit * 2 if limit >= 3 else len(text)
+    while True:
+        compact = " ".join(text[:window].split())
+        if len(compact) > limit:
+            return f"{compact[: limit - 3]}..."
+        if window >= len(text):
+            return compact
+        window *= 2
+
+
+def make_doc_snippet(cache: Dict[Tuple[int, int], str], law_id: int, text: str, limit: int = 200) -> str:
+    """``make_snippet`` memoized in ``cache`` by ``(law_id, limit)``.
+
+    A law id only names the same text within one corpus, so callers own the
+    cache and keep it no longer than that corpus (e.g. one dict per run).
+    """
+
+    key = (law_id, limit)
+    snippet = cache.get(key)
+    if snippet is None:
+        snippet = cache[key] = make_snippet(text, limit=limit)
+    return snippet
 
 
 def _serialize_doc(doc: LawDocument | None) -> dict | None:
@@ -48,6 +156,22 @@ def _serialize_doc(doc: LawDocument | None) -> dict | None:
     }
 
 
+class _SerializedDocs(dict):
+    """law_id -> ``_serialize_doc`` output (or None), filled from the corpus on first lookup.
+
+    Repeat lookups are plain dict hits with no Python-level call; only a miss
+    goes through ``__missing__``.
+    """
+
+    def __init__(self, corpus: LawCorpus) -> None:
+        super().__init__()
+        self._corpus_get = corpus.get
+
+    def __missing__(self, law_id: int) -> dict | None:
+        doc = self[law_id] = _serialize_doc(self._corpus_get(law_id))
+        return doc
+
+
 def export_bad_cases(
     results: Iterable[dict],
     corpus: LawCorpus,
@@ -55,46 +179,52 @@ def export_bad_cases(
     top_errors: int = 3,
     max_cases: int | None = None,
 ) -> None:
-    """Create a diff-style file for the trickiest queries."""
-
-    diff_cases: List[dict] = []
-    for entry in results:
-        gt_ids = {int(law_id) for law_id in entry.get("law_ids", []) if law_id is not None}
-        predictions = entry.get("predictions", [])
-        if not predictions:
-            continue
-        hit = any(int(pred.get("law_id")) in gt_ids for pred in predictions if pred.get("law_id") is not None)
-        if hit:
-            continue
-        bench_source = entry.get("bench_source")
-        law_texts = entry.get("law_texts") or []
-        ground_truth_docs = [doc for doc in (_serialize_doc(corpus.get(law_id)) for law_id in gt_ids) if doc]
-        if not ground_truth_docs and law_texts:
-            ground_truth_docs = law_texts
-        wrong_docs = []
-        for pred in predictions:
-            law_id = pred.get("law_id")
-            if law_id is None:
+    """Create a diff-style file for the trickiest queries.
+
+    Cases are streamed to ``output_path`` as they are built, so only one is held
+    in memory at a time. Law ids are expected as ints, as ``run_benchmark``
+    records them (normalized at load time and by the retrievers); to rebuild
+    cases from a saved ``predictions.json``, read it with ``load_results_json``.
+    """
+
+    # Popular laws recur across failing queries; serialize (and snippet) each once.
+    serialized = _SerializedDocs(corpus)
+
+    with JsonArrayWriter(output_path) as writer:
+        for entry in results:
+            gt_ids = set(entry.get("law_ids", []))
+            predictions = entry.get("predictions", [])
+            if not predictions:
                 continue
-            doc = _serialize_doc(corpus.get(int(law_id)))
-            if not doc:
+            # Predictions without a law_id yield None, which never matches.
+            if not gt_ids.isdisjoint(map(dict.get, predictions, repeat("law_id"))):
                 continue
-            wrong_docs.append({
-                **doc,
-                "score": pred.get("score"),
-            })
-            if len(wrong_docs) >= top_errors:
+            bench_source = entry.get("bench_source")
+            law_texts = entry.get("law_texts") or []
+            ground_truth_docs = [doc for doc in map(serialized.__getitem__, gt_ids) if doc]
+            if not ground_truth_docs and law_texts:
+                ground_truth_docs = law_texts
+            wrong_docs = []
+            for pred in predictions:
+                law_id = pred.get("law_id")
+                if law_id is None:
+                    continue
+                doc = serialized[law_id]
+                if not doc:
+                    continue
+                wrong_doc = doc.copy()
+                wrong_doc["score"] = pred.get("score")
+                wrong_docs.append(wrong_doc)
+                if len(wrong_docs) >= top_errors:
+                    break
+            # Every case has the same keys (null / [] when absent) in the same order.
+            case_payload = {
+                "query": entry.get("query"),
+                "ground_truth": ground_truth_docs,
+                "mistakes": wrong_docs,
+                "bench_source": bench_source or None,
+                "law_texts": law_texts,
+            }
+            writer.write(case_payload)
+            if max_cases is not None and writer.count >= max_cases:
                 break
-        case_payload = {
-            "query": entry.get("query"),
-            "ground_truth": ground_truth_docs,
-            "mistakes": wrong_docs,
-        }
-        if bench_source:
-            case_payload["bench_source"] = bench_source
-        if law_texts:
-            case_payload["law_texts"] = law_texts
-        diff_cases.append(case_payload)
-        if max_cases is not None and len(diff_cases) >= max_cases:
-            break
-    save_json(diff_cases, output_path)